@@ -13,6 +13,7 @@ GameListener class and generate EventKind events.
 """
 
 from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
 
 class EventKind(Enum):
     """All the kinds of events that we may notify listeners of"""
@@ -24,6 +25,8 @@ class EventKind(Enum):
 class GameEvent(object):
     """An event that may need to be depicted
     """
+    __slots__ = ('kind', 'tile')
+
     def __init__(self, kind: EventKind,  tile: "Tile"):
         self.kind = kind
         self.tile = tile
@@ -37,9 +40,19 @@ class GameListener(object):
     game events in a model-view-controller pattern.
     Each listener must implement a 'notify' method.
     """
+    __slots__ = ()
+
     def notify(self, event: GameEvent):
         raise NotImplementedError("Game Listener classes must implement 'notify'")
 
+    def notify_batch(self, events: List[GameEvent]):
+        """Receive all the events of one move at once.
+        Listeners that can coalesce updates may override this;
+        by default each event is passed to 'notify' in order.
+        """
+        for event in events:
+            self.notify(event)
+
 # -------------------------------------------
 
 
@@ -47,15 +60,28 @@ class GameElement(object):
     """Base class for game elements, especially to support
     depiction through Model-View-Controller.
     """
+    __slots__ = ('_listeners_by_kind',)
 
     def __init__(self):
         """Each game element can have zero or more listeners.
         Listeners are view components that react to notifications.
         """
-        self._listeners = []
+        self._listeners_by_kind: Dict[EventKind, Tuple[GameListener, ...]] = {}
 
-    def add_listener(self, listener: GameListener):
-        self._listeners.append(listener)
+    def add_listener(self, listener: GameListener,
+                     kinds: Optional[Iterable[EventKind]] = None):
+        """Register a listener for the given kinds of event
+        (all kinds if 'kinds' is None).  Listeners are added
+        rarely and iterated often, so each kind keeps a tuple.
+        """
+        if kinds is None:
+            kinds = EventKind
+        for kind in kinds:
+            self._listeners_by_kind[kind] = self.listeners(kind) + (listener,)
+
+    def listeners(self, kind: EventKind) -> Tuple[GameListener, ...]:
+        """The listeners interested in events of this kind"""
+        return self._listeners_by_kind.get(kind, ())
 
     def notify_all(self, event: GameEvent):
         """Instead of handling graphics in the model component,
@@ -64,6 +90,5 @@ class GameElement(object):
         When additional information must be packaged with an event,
         it goes in the optional 'data' parameter.
         """
-        for listener in self._listeners:
+        for listener in self._listeners_by_kind.get(event.kind, ()):
             listener.notify(event)
-
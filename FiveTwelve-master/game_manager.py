@@ -4,9 +4,14 @@ model and view and implements controller
 functionality by interpreting keyboard input
 """
 import model
-import view
 import keypress
 import sys
+# Drawn with graphics.py and Tk, or with pygame if the game
+# is started with --pygame
+if "--pygame" in sys.argv[1:]:
+    import view_pygame as view
+else:
+    import view
 
 
 def main():
@@ -14,29 +19,33 @@ def main():
     grid = model.Board()
     # Set up view component
     game_view = view.GameView(600, 600)
-    grid_view = view.GridView(game_view, len(grid.tiles))
+    grid_view = view.GridView(game_view, grid.rows)
     grid.add_listener(grid_view)
     # Handle control component responsibility here
     commands = keypress.Command(game_view)
+    moves = {keypress.LEFT: grid.left, keypress.RIGHT: grid.right,
+             keypress.UP: grid.up, keypress.DOWN: grid.down}
 
     # FIXME: We will change this to
     #  grid.place_tile(value=2) after
     #  creating the keyword argument in model.py
+    # The game starts with two tiles on the board
+    grid.place_tile()
     grid.place_tile()
 
     # Game continues until there is no empty
-    # space for a tile
-    while grid.has_empty():
-        grid.place_tile()
+    # space for a tile.  A new tile is placed only
+    # after a move, not after an unmapped key.
+    while True:
         cmd = commands.next()
-        if cmd == keypress.LEFT:
-            grid.left()
-        elif cmd == keypress.RIGHT:
-            grid.right()
-        elif cmd == keypress.UP:
-            grid.up()
-        elif cmd == keypress.DOWN:
-            grid.down()
+        move = moves.get(cmd)
+        if move is not None:
+            # Draw the move and the new tile in one repaint
+            with grid_view.batch():
+                move()
+                if not grid.has_empty():
+                    break
+                grid.place_tile()
         elif cmd == keypress.CLOSE:
             # Ended game by closing window
             print(f"Your score: {grid.score()}")
@@ -10,7 +10,6 @@ we would need to use curses functions to obtain keystrokes.
 """
 
 import sys
-import graphics
 
 # Internal codes for commands. 
 
@@ -49,12 +48,12 @@ class Command(object):
     def next(self):
         try:
             key = self.game_view.get_key()
-            if key not in KEY_BINDINGS:
-                return UNMAPPED
-            else:
-                return KEY_BINDINGS[key]
-        except graphics.graphics.GraphicsError as e:
-            # This happens when the close button is pressed.
+            return KEY_BINDINGS.get(key, UNMAPPED)
+        except Exception as e:
+            # The view raises its GraphicsError when the close
+            # button is pressed.  Checking isClosed rather than the
+            # exception type keeps this module free of any one
+            # graphics library.
             if self.game_view.win.isClosed():
                 return CLOSE
             raise e
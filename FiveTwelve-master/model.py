@@ -10,38 +10,48 @@ particular view component, but it produces event
 notifications to trigger view updates. 
 """
 
-from game_element import GameElement
-from typing import List
 from game_element import GameElement, GameEvent, EventKind
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, NamedTuple
 import random
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernel runs as plain Python
+    def njit(*args, **kwargs):
+        def decorate(fn):
+            return fn
+        return decorate
 
 # Configuration constants
 GRID_SIZE = 4
 
 
-class Vec():
+class Vec(NamedTuple):
     """A Vec is an (x,y) or (row, column) pair that
     represents distance along two orthogonal axes.
     Interpreted as a position, a Vec represents
     distance from (0,0).  Interpreted as movement,
     it represents distance from another position.
     Thus we can add two Vecs to get a Vec.
+    As a NamedTuple it has no per-instance __dict__,
+    and equality and hashing come from tuple.
     """
-
-    def __init__(self, row: int, col: int):
-        self.row = row
-        self.col = col
+    row: int
+    col: int
 
     def __add__(self, other: "Vec") -> "Vec":
         return Vec(self.row + other.row, self.col + other.col)
 
-    def __eq__(self, other: "Vec") -> "Vec":
-        return self.row == other.row and self.col == other.col
-
 
 class Tile(GameElement):
-    """A slidy numbered thing."""
+    """A slidy numbered thing.  The Board moves and merges
+    tiles and announces the changes, in batches, to the
+    listeners of the board and of each tile.
+    """
+    __slots__ = ('row', 'col', 'value')
 
     def __init__(self, pos: Vec, value: int):
         super().__init__()
@@ -56,71 +66,127 @@ class Tile(GameElement):
     def __str__(self):
         return str(self.value)
 
-    def __eq__(self, other: "Tile"):
-        return self.value == other.value
-
-    def move_to(self, new_pos: Vec):
-        self.row = new_pos.row
-        self.col = new_pos.col
-        self.notify_all(GameEvent(EventKind.tile_updated, self))
-
-    def merge(self, other: "Tile"):
-        # This tile incorporates the value of the other tile
-        self.value = self.value + other.value
-        self.notify_all(GameEvent(EventKind.tile_updated, self))
-        # The other tile has been absorbed.  Resistance was futile.
-        other.notify_all(GameEvent(EventKind.tile_removed, other))
 
+@njit(cache=True)
+def _compress(line: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Slide the values in a line toward index 0, merging
+    equal tiles the FiveTwelve way: a tile that absorbs
+    another stops there, but may itself be absorbed by the
+    next tile along.  Returns the new line and, for each
+    index of the old line, the index its tile ends up in
+    (-1 where there was no tile).
+    Written in the subset of Python that numba compiles.
+    """
+    result = np.zeros_like(line)
+    dest = np.full(len(line), -1)
+    last = -1
+    for i in range(len(line)):
+        value = line[i]
+        if value == 0:
+            continue
+        if last >= 0 and result[last] == value:
+            result[last] += value
+        else:
+            last += 1
+            result[last] = value
+        dest[i] = last
+    return result, dest
+
+
+# Results of _compress, keyed by the line's values.  A board
+# has few distinct lines, so after the first few moves nearly
+# every line is found here.
+_line_moves: Dict[Tuple[int, ...], Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+
+
+def _move_line(line: Tuple[int, ...]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Memoized _compress on a tuple of ints; returns the
+    new line and destination indices as tuples of ints.
+    """
+    result = _line_moves.get(line)
+    if result is None:
+        new_line, dest = _compress(np.array(line, dtype=np.int32))
+        result = tuple(new_line.tolist()), tuple(dest.tolist())
+        _line_moves[line] = result
+    return result
 
 
 class Board(GameElement):
     """The game grid.  Inherits 'add_listener' and 'notify_all'
     methods from game_element.GameElement so that the game
     can be displayed graphically.
+
+    Tile values are kept in a NumPy int array (0 for an empty
+    space), with a parallel array of tile ids.  The Tile objects
+    themselves live in a dict keyed by id and exist only so that
+    views can listen to them.
     """
+    __slots__ = ('rows', 'cols', '_values', '_ids', '_tiles', '_next_id',
+                 '_empty_count', '_score', '_orders', '_event_buffer')
 
     def __init__(self, rows=4, cols=4):
         super().__init__()
         self.rows = rows
         self.cols = cols
-        self.tiles = [ ]
-        for row in range(rows):
-            row_tiles = [ ]
-            for col in range(cols):
-                row_tiles.append(None)
-            self.tiles.append(row_tiles)
-
-    def __getitem__(self, pos: Vec) -> Tile:
-        return self.tiles[pos.row][pos.col]
-
-    def __setitem__(self, pos: Vec, tile: Tile):
-        self.tiles[pos.row][pos.col] = tile
+        self._values = np.zeros((rows, cols), dtype=np.int32)
+        self._ids = np.zeros((rows, cols), dtype=np.int32)
+        self._tiles = {}
+        self._next_id = 1
+        self._empty_count = rows * cols
+        self._score = 0
+        self._orders = self._traversal_orders(rows, cols)
+        self._event_buffer: List[GameEvent] = []
+
+    @staticmethod
+    def _traversal_orders(rows: int, cols: int) -> Dict[str, np.ndarray]:
+        """Traversal order for each move: each row of a table holds
+        the flat indices of one line of the board, starting
+        from the edge the tiles slide toward.
+        """
+        cells = np.arange(rows * cols).reshape(rows, cols)
+        return {"left": cells,
+                "right": cells[:, ::-1].copy(),
+                "up": cells.T.copy(),
+                "down": cells.T[:, ::-1].copy()}
+
+    def __getitem__(self, pos: Vec) -> Optional[Tile]:
+        return self._tiles.get(int(self._ids[pos.row, pos.col]))
+
+    def _add_tile(self, row: int, col: int, value: int) -> Tile:
+        """Create a tile at row,col and record it in the
+        value and id arrays.  Id 0 is reserved for 'empty'.
+        """
+        tile = Tile(Vec(row, col), value)
+        tile_id = self._next_id
+        self._next_id += 1
+        self._tiles[tile_id] = tile
+        self._ids[row, col] = tile_id
+        self._values[row, col] = value
+        return tile
 
     def to_list(self) -> List[List[int]]:
         """Test scaffolding: represent each Tile by its
         integer value and empty positions as 0
         """
-        result = []
-        for row in self.tiles:
-            row_values = []
-            for col in row:
-                if col is None:
-                    row_values.append(0)
-                else:
-                    row_values.append(col.value)
-            result.append(row_values)
-        return result
+        return self._values.tolist()
 
     def from_list(self, values: List[List[int]]):
         """Test scaffolding: set board tiles to the
         given values, where 0 represents an empty space.
+        The board takes the shape of 'values'.
         """
-        for row in range(len(values)):
-            for col in range(len(values[0])):
-                if values[row][col] == 0:
-                    self.tiles[row][col] = None
-                else:
-                    self.tiles[row][col] = Tile(Vec(row, col), values[row][col])
+        # A copy, so that moves do not change the caller's array
+        self._values = np.array(values, dtype=np.int32)
+        if self._values.shape != (self.rows, self.cols):
+            self.rows, self.cols = self._values.shape
+            self._orders = self._traversal_orders(self.rows, self.cols)
+        self._ids = np.zeros_like(self._values)
+        self._tiles = {}
+        self._empty_count = int((self._values == 0).sum())
+        self._score = int(self._values.sum())
+        for (row, col), value in zip(np.argwhere(self._values).tolist(),
+                                     self._values[self._values != 0].tolist()):
+            self._add_tile(row, col, value)
 
     def in_bounds(self, pos: Vec) -> bool:
         """Is position (pos.x, pos.y) a legal position on the board?"""
@@ -131,101 +197,153 @@ class Board(GameElement):
         in direction (dx,dy) until it bumps into
         another tile or the edge of the board.
         """
-        if self[pos] is None:
+        tile = self[pos]
+        if tile is None:
             return
-        while True:
-            new_pos = pos + dir
-            if not self.in_bounds(new_pos):
-                break
-            if self[new_pos] is None:
-                self._move_tile(pos, new_pos)
-            elif self[pos] == self[new_pos]:
-                self[pos].merge(self[new_pos])
-                self._move_tile(pos, new_pos)
-                break  # Stop moving when we merge with another tile
-            else:
-                # Stuck against another tile
-                break
-            pos = new_pos
-
-    def _move_tile(self, old_pos: "Vec", new_pos: "Vec"):
-        if self[old_pos] is not None:
-            self[old_pos].move_to(new_pos)
-            self[new_pos] = self[old_pos]
-            self[old_pos] = None
-
-    def _empty_positions(self) -> List[Vec]:
-        """Return a list of positions of None values,
-        i.e., unoccupied spaces.
+        values, ids = self._values, self._ids
+        start = (tile.row, tile.col)
+        with self._batch() as events:
+            while True:
+                new_pos = pos + dir
+                if not self.in_bounds(new_pos):
+                    break
+                other_id = int(ids[new_pos])
+                if other_id:
+                    if values[new_pos] != tile.value:
+                        # Stuck against another tile
+                        break
+                    # This tile absorbs the other one
+                    other = self._tiles.pop(other_id)
+                    tile.value += other.value
+                    self._empty_count += 1
+                    events.append(GameEvent(EventKind.tile_removed, other))
+                tile.row, tile.col = new_pos
+                ids[new_pos] = ids[pos]
+                values[new_pos] = tile.value
+                ids[pos] = 0
+                values[pos] = 0
+                if other_id:
+                    break  # Stop moving when we merge with another tile
+                pos = new_pos
+            if (tile.row, tile.col) != start:
+                events.append(GameEvent(EventKind.tile_updated, tile))
+
+    def _empty_positions(self) -> np.ndarray:
+        """Return the flat indices (row * cols + col) of
+        unoccupied spaces.
         """
-        empties = []
-        for row in range(len(self.tiles)):
-            for col in range(len(self.tiles[row])):
-                if col is not None:
-                    empties.append(Vec(row, col))
-        return empties
+        return np.flatnonzero(self._values == 0)
 
     def has_empty(self) -> bool:
         """Is there at least one grid element without a tile?"""
-        for row in self.tiles:
-            for col in row:
-                if col is None:
-                    return True
-        return False
+        return self._empty_count > 0
 
     def place_tile(self, value=None):
         """Place a tile on a randomly chosen empty square."""
         empties = self._empty_positions()
         assert len(empties) > 0
-        choice = random.choice(empties)
-        row, col = choice.row, choice.col
+        row, col = divmod(int(empties[random.randrange(len(empties))]), self.cols)
         if value is None:
             # 0.1 probability of 4
-            if random.random() > 0.1:
-                value = 4
-            else:
-                value = 2
-        new_tile = Tile(Vec(row, col), value)
-        self.tiles[row][col] = new_tile
+            value = 2 if random.random() < 0.9 else 4
+        new_tile = self._add_tile(row, col, value)
+        self._empty_count -= 1
+        self._score += value
         self.notify_all(GameEvent(EventKind.tile_created, new_tile))
 
+    @contextmanager
+    def _batch(self):
+        """Buffer tile events in self._event_buffer, then
+        deliver them with one 'notify_batch' call per listener
+        rather than one 'notify' call per event.  Events go to
+        the board's listeners as well as the tile's, so a view
+        can follow every tile through a single listener.
+        """
+        self._event_buffer = []
+        yield self._event_buffer
+        events, self._event_buffer = self._event_buffer, []
+        batches = {}
+        for event in events:
+            for listener in self.listeners(event.kind):
+                batches.setdefault(listener, []).append(event)
+            for listener in event.tile.listeners(event.kind):
+                batches.setdefault(listener, []).append(event)
+        for listener, batch in batches.items():
+            listener.notify_batch(batch)
+
+    def _move(self, order: np.ndarray):
+        """Move every tile toward the start of its line, where
+        each row of 'order' lists the flat indices of one line
+        of the board (see self._orders).  Listeners are notified
+        once all lines have been moved.
+        """
+        values = self._values.take(order)
+        ids = self._ids.take(order)
+        with self._batch() as events:
+            self._move_lines(values, ids, order, events)
+            np.put(self._values, order, values)
+            np.put(self._ids, order, ids)
+
+    def _move_lines(self, values: np.ndarray, ids: np.ndarray,
+                    order: np.ndarray, events: List[GameEvent]):
+        """Compress each line of 'values' (and the matching
+        'ids') in place, appending the resulting tile events
+        to 'events'.
+        """
+        tiles, cols = self._tiles, self.cols
+        updated, removed = EventKind.tile_updated, EventKind.tile_removed
+        new_lines = values.tolist()
+        all_ids = ids.tolist()
+        for old_ids, line, cells in zip(all_ids, new_lines, order.tolist()):
+            key = tuple(line)
+            new_line, dest = _move_line(key)
+            # A line whose values are unchanged had no tile move or
+            # merge, so it needs no bookkeeping and no events
+            if new_line == key:
+                continue
+            new_ids = [0] * len(old_ids)
+            for i, j in enumerate(dest):
+                if not old_ids[i]:
+                    continue
+                if new_ids[j]:
+                    # The tile already there is absorbed by this one
+                    events.append(GameEvent(removed, tiles.pop(new_ids[j])))
+                    self._empty_count += 1
+                new_ids[j] = old_ids[i]
+            for tile_id, value, cell in zip(new_ids, new_line, cells):
+                if not tile_id:
+                    continue
+                tile = tiles[tile_id]
+                row, col = divmod(cell, cols)
+                if (tile.row, tile.col, tile.value) != (row, col, value):
+                    tile.row, tile.col, tile.value = row, col, value
+                    events.append(GameEvent(updated, tile))
+            old_ids[:] = new_ids
+            line[:] = new_line
+        ids[:] = all_ids
+        values[:] = new_lines
+
     def right(self):
-        for row in range(len(self.tiles)):
-            for col in range(self.cols - 1, -1, -1):
-                pos = Vec(row, col)
-                self.slide(pos, Vec(0, 1))
+        self._move(self._orders["right"])
 
     def left(self):
-        for row in range(len(self.tiles)):
-            for col in range(self.cols):
-                pos = Vec(row, col)
-                self.slide(pos, Vec(0, -1))
+        self._move(self._orders["left"])
 
     def up(self):
-        for col in range(len(self.tiles)):
-            for row in range(self.rows):
-                pos = Vec(row, col)
-                self.slide(pos, Vec(-1, 0))
-
+        self._move(self._orders["up"])
 
     def down(self):
-        for col in range(len(self.tiles)):
-            for row in range(self.rows):
-                pos = Vec(row, col)
-                self.slide(pos, Vec(1, 0))
+        self._move(self._orders["down"])
 
     def score(self) -> int:
         """Calculate a score from the board.
         (Differs from classic 1024, which calculates score
         based on sequence of moves rather than state of
         board.
+        Merges do not change the sum, so it is kept up to
+        date as tiles are placed.
         """
-        score = 0
-        val = self.to_list()
-        for row in range(self.rows):
-            for col in range(self.cols):
-                score += val[row][col]
-        return score
+        return self._score
 
 
 
@@ -1,66 +1,67 @@
 """
 Tests for model.py.
 
-Note that the unittest module predates PEP-8 guidelines, which
-is why we have a bunch of names that don't comply with the
-standard.
+Run with pytest.  The slide and move tests are parametrized:
+each case is a starting board, an action, and the board we
+expect afterward.
 """
-import posix
+import numpy as np
+import pytest
 
 import model
 from model import Vec, Board, Tile
-import unittest
-import sys
+from game_element import GameListener, EventKind
 
 
-class TestVec(unittest.TestCase):
+class TestVec:
 
     def test_equality(self):
         v1 = Vec(7, 12)
         v2 = Vec(8, 13)
-        self.assertNotEqual(v1, v2)
+        assert v1 != v2
         v3 = Vec(7, 12)
-        self.assertEqual(v1, v3)
+        assert v1 == v3
 
     def test_addition(self):
         v1 = Vec(8, 7)
         v2 = Vec(12, 15)
-        self.assertEqual(v1 + v2, Vec(20, 22))
+        assert v1 + v2 == Vec(20, 22)
         # Addition does not modify the points that have been added
-        self.assertEqual(v1, Vec(8, 7))
-        self.assertEqual(v2, Vec(12, 15))
+        assert v1 == Vec(8, 7)
+        assert v2 == Vec(12, 15)
 
 
-class TestBoardConstructor(unittest.TestCase):
+class TestBoardConstructor:
 
     def test_default(self):
         board = Board()
-        self.assertEqual(board.tiles, [[None, None, None, None],
-                                       [None, None, None, None],
-                                       [None, None, None, None],
-                                       [None, None, None, None]])
+        assert board.to_list() == [[0, 0, 0, 0],
+                                   [0, 0, 0, 0],
+                                   [0, 0, 0, 0],
+                                   [0, 0, 0, 0]]
 
     def test_3x5(self):
         board = Board(rows=3, cols=5)
-        self.assertEqual(board.tiles, [[None, None, None, None, None],
-                                 [None, None, None, None, None],
-                                 [None, None, None, None, None]])
+        assert board.to_list() == [[0, 0, 0, 0, 0],
+                                   [0, 0, 0, 0, 0],
+                                   [0, 0, 0, 0, 0]]
 
     def test_constructed_empties(self):
         """A newly constructed Board should always have at least
         one empty space.
         """
         board = model.Board()
-        self.assertTrue(board.has_empty())
+        assert board.has_empty()
 
-class TestScaffolding(unittest.TestCase):
+
+class TestScaffolding:
 
     def test_to_from_list(self):
         """to_list and from_list should be inverse"""
         board = model.Board()
         as_list = [[0, 2, 2, 4], [2, 0, 2, 8], [8, 2, 2, 4], [4, 2, 2, 0]]
         board.from_list(as_list)
-        self.assertEqual(board.to_list(), as_list)
+        assert board.to_list() == as_list
 
     def test_from_to(self):
         """to_list and from_list should be inverse"""
@@ -71,193 +72,315 @@ class TestScaffolding(unittest.TestCase):
         as_list = board.to_list()
         board.from_list(as_list)
         again = board.to_list()
-        self.assertEqual(as_list, again)
+        assert as_list == again
 
+    def test_empty_positions(self):
+        """Only unoccupied spaces are candidates for a new tile"""
+        board = model.Board()
+        board.from_list([[2, 0, 2, 2],
+                         [2, 2, 2, 2],
+                         [2, 2, 2, 0],
+                         [0, 2, 2, 2]])
+        assert board._empty_positions().tolist() == [1, 11, 12]
+        board.place_tile(value=8)
+        board.place_tile(value=8)
+        board.place_tile(value=8)
+        assert not board.has_empty()
+        assert board.to_list()[0][1] == 8
+
+    def test_from_list_copies(self):
+        """Moves must not change the array the board came from"""
+        values = np.array([[0, 2, 2, 4]] * 4, dtype=np.int32)
+        board = model.Board()
+        board.from_list(values)
+        board.left()
+        assert values.tolist() == [[0, 2, 2, 4]] * 4
+
+    def test_from_list_shape(self):
+        """The board takes the shape of the list"""
+        board = model.Board()
+        board.from_list([[2, 2, 4],
+                         [0, 0, 2]])
+        assert (board.rows, board.cols) == (2, 3)
+        board.left()
+        assert board.to_list() == [[8, 0, 0],
+                                   [2, 0, 0]]
+        board.right()
+        assert board.to_list() == [[0, 0, 8],
+                                   [0, 0, 2]]
+        assert board.in_bounds(Vec(1, 2))
+        assert not board.in_bounds(Vec(2, 0))
 
-class TestBoundsCheck(unittest.TestCase):
+
+class TestBoundsCheck:
 
     def test_bounds_default_shape(self):
         board = model.Board()
-        self.assertTrue(board.in_bounds(Vec(0,0)))
-        self.assertTrue(board.in_bounds(Vec(3,3)))
-        self.assertTrue(board.in_bounds(Vec(1,2)))
-        self.assertTrue(board.in_bounds(Vec(0,3)))
-        self.assertFalse(board.in_bounds(Vec(-1,0))) # off the top
-        self.assertFalse(board.in_bounds(Vec(1,-1))) # off the left
-        self.assertFalse(board.in_bounds(Vec(4,3)))  # off the bottom
-        self.assertFalse(board.in_bounds(Vec(1,4)))  # off the right
+        assert board.in_bounds(Vec(0,0))
+        assert board.in_bounds(Vec(3,3))
+        assert board.in_bounds(Vec(1,2))
+        assert board.in_bounds(Vec(0,3))
+        assert not board.in_bounds(Vec(-1,0))  # off the top
+        assert not board.in_bounds(Vec(1,-1))  # off the left
+        assert not board.in_bounds(Vec(4,3))   # off the bottom
+        assert not board.in_bounds(Vec(1,4))   # off the right
 
     def test_bounds_odd_shape(self):
         """Non-square board to make sure we're using row and column
         correctly.
         """
         board = model.Board(rows=2,cols=4)
-        self.assertTrue(board.in_bounds(Vec(0,0)))
-        self.assertTrue(board.in_bounds(Vec(1,3)))
-        self.assertFalse(board.in_bounds(Vec(3,1)))
-
-
-class TestSlide(unittest.TestCase):
+        assert board.in_bounds(Vec(0,0))
+        assert board.in_bounds(Vec(1,3))
+        assert not board.in_bounds(Vec(3,1))
+
+
+@pytest.mark.parametrize("before, pos, dir, after", [
+    pytest.param([[0, 0, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 Vec(1, 2), Vec(0, -1),  # Slide the 2 left
+                 [[0, 0, 0, 0],
+                  [2, 0, 0, 0],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 id="left_to_edge"),
+    pytest.param([[0, 0, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 Vec(1, 2), Vec(0, 1),  # Slide the 2 right
+                 [[0, 0, 0, 0],
+                  [0, 0, 0, 2],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 id="right_to_edge"),
+    pytest.param([[0, 0, 0, 0],
+                  [0, 0, 0, 4],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 Vec(1, 3), Vec(0, 1),  # To the right
+                 [[0, 0, 0, 0],
+                  [0, 0, 0, 4],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 id="already_at_edge"),
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 Vec(1, 0), Vec(0, 1),  # Space 1,0 is empty
+                 [[2, 0, 0, 0],
+                  [0, 2, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 id="empty_wont_slide"),
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 4, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 Vec(1, 1), Vec(0, 1),  # Stops against the 4
+                 [[2, 0, 0, 0],
+                  [0, 2, 4, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 id="into_obstacle"),
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 2, 4],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 Vec(1, 1), Vec(0, 1),  # Equal tiles merge when they meet
+                 [[2, 0, 0, 0],
+                  [0, 0, 4, 4],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 id="merge"),
+])
+def test_slide(before, pos, dir, after):
+    """A tile slides until it reaches the edge or another tile,
+    merging with that tile if their values are equal.
+    """
+    board = model.Board()
+    board.from_list(before)
+    board.slide(pos, dir)
+    assert board.to_list() == after
+
+
+# The moves are 'right', 'left', 'up', 'down'.
+# These methods are normally called from the 'keypress.py' module.
+@pytest.mark.parametrize("before, move, after", [
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 "right",
+                 [[0, 0, 0, 2],
+                  [0, 0, 0, 2],
+                  [0, 0, 0, 2],
+                  [0, 0, 0, 2]],
+                 id="all_right"),
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 "left",
+                 [[2, 0, 0, 0],
+                  [2, 0, 0, 0],
+                  [2, 0, 0, 0],
+                  [2, 0, 0, 0]],
+                 id="all_left"),
+    pytest.param([[2, 0, 0, 0],
+                  [0, 2, 0, 0],
+                  [0, 0, 2, 0],
+                  [0, 0, 0, 2]],
+                 "up",
+                 [[2, 2, 2, 2],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 id="all_up"),
+    pytest.param([[2, 0, 2, 0],
+                  [2, 2, 2, 0],
+                  [2, 2, 0, 0],
+                  [2, 2, 2, 2]],
+                 "right",
+                 [[0, 0, 0, 4],
+                  [0, 0, 2, 4],  # Must work from right to left
+                  [0, 0, 0, 4],
+                  [0, 0, 4, 4]],  # Tile stops sliding when it merges
+                 id="merge_right"),
+    pytest.param([[4, 0, 2, 2],
+                  [2, 0, 2, 2],
+                  [2, 2, 4, 0],
+                  [2, 2, 2, 2]],
+                 "up",
+                 [[4, 4, 8, 4],
+                  [4, 0, 2, 2],
+                  [2, 0, 0, 0],
+                  [0, 0, 0, 0]],
+                 id="merge_up"),
+    pytest.param([[4, 0, 2, 2],
+                  [2, 0, 2, 2],
+                  [2, 2, 4, 0],
+                  [2, 2, 2, 2]],
+                 "down",
+                 [[0, 0, 0, 0],
+                  [4, 0, 4, 0],
+                  [2, 0, 4, 2],
+                  [4, 4, 2, 4]],  # Must work from bottom to top
+                 id="merge_down"),
+    pytest.param([[4, 2, 2, 8],
+                  [2, 4, 4, 4],
+                  [0, 0, 0, 0],
+                  [2, 0, 0, 2]],
+                 "left",
+                 [[4, 4, 8, 0],
+                  [2, 8, 4, 0],
+                  [0, 0, 0, 0],
+                  [4, 0, 0, 0]],
+                 id="merge_left"),
+])
+def test_move(before, move, after):
+    board = model.Board()
+    board.from_list(before)
+    getattr(board, move)()
+    assert board.to_list() == after
+
+
+def test_score():
+    """Score is the sum of the tiles, unchanged by merges"""
+    board = model.Board()
+    board.from_list([[2, 2, 4, 0],
+                     [0, 0, 0, 0],
+                     [0, 8, 0, 0],
+                     [0, 8, 0, 0]])
+    assert board.score() == 24
+    board.right()
+    board.down()
+    assert board.score() == 24
+    board.place_tile(value=4)
+    assert board.score() == 28
+
+
+class RecordingListener(GameListener):
+    """Keeps each batch of events it is notified of"""
+
+    def __init__(self):
+        self.batches = []
+
+    def notify(self, event):
+        self.batches.append([event])
+
+    def notify_batch(self, events):
+        self.batches.append(list(events))
+
+
+def listening_board(values, kinds=None):
+    """A board holding 'values', with one RecordingListener
+    attached to all of its tiles.
+    """
+    board = model.Board()
+    board.from_list(values)
+    listener = RecordingListener()
+    for tile in board._tiles.values():
+        tile.add_listener(listener, kinds)
+    return board, listener
+
+
+class TestNotify:
+
+    def test_move_notifies_once_per_listener(self):
+        """All the events of a move arrive in a single batch"""
+        board, listener = listening_board([[2, 2, 4, 0],
+                                           [0, 0, 0, 0],
+                                           [0, 0, 0, 0],
+                                           [0, 0, 0, 0]])
+        board.right()
+        assert len(listener.batches) == 1
+        kinds = sorted(event.kind.name for event in listener.batches[0])
+        assert kinds == ["tile_removed", "tile_updated", "tile_updated"]
+
+    def test_ineffective_move_is_silent(self):
+        """Tiles that cannot move are not notified"""
+        board, listener = listening_board([[2, 4, 0, 0],
+                                           [8, 0, 0, 0],
+                                           [0, 0, 0, 0],
+                                           [4, 2, 4, 2]])
+        board.left()
+        assert listener.batches == []
+
+    def test_listener_kinds(self):
+        """A listener registered for some kinds hears only those"""
+        board, listener = listening_board([[2, 2, 4, 0],
+                                           [0, 0, 0, 0],
+                                           [0, 0, 0, 0],
+                                           [0, 0, 0, 0]],
+                                          {EventKind.tile_removed})
+        board.right()
+        kinds = [event.kind for batch in listener.batches for event in batch]
+        assert kinds == [EventKind.tile_removed]
 
-    def test_slide_left_to_edge(self):
-        """A tile should stop just when it reaches the edge"""
-        board = model.Board()
-        board.from_list([[0, 0, 0, 0],
-                         [0, 0, 2, 0],
-                         [0, 0, 0, 0],
-                         [0, 0, 0, 0]])
-        board.slide(Vec(1, 2), Vec(0, -1))  # Slide the 2 left
-        self.assertEqual(board.to_list(),
-                         [[0, 0, 0, 0],
-                          [2, 0, 0, 0],
-                          [0, 0, 0, 0],
-                          [0, 0, 0, 0]])
-
-    def test_slide_right_to_edge(self):
-        """A tile should stop just when it reaches the edge"""
+    def test_board_listener_hears_tile_events(self):
+        """Listeners on the board get the events of every tile"""
         board = model.Board()
-        board.from_list([[0, 0, 0, 0],
-                         [0, 0, 2, 0],
+        board.from_list([[2, 2, 4, 0],
                          [0, 0, 0, 0],
-                         [0, 0, 0, 0]])
-        board.slide(Vec(1, 2), Vec(0, 1))  # Slide the 2 right
-        self.assertEqual(board.to_list(),
-                         [[0, 0, 0, 0],
-                          [0, 0, 0, 2],
-                          [0, 0, 0, 0],
-                          [0, 0, 0, 0]])
-
-    def test_slide_already_at_edge(self):
-        """A tile already at the edge can't slide farther that way"""
-        board = model.Board()
-        board.from_list([[0, 0, 0, 0],
-                         [0, 0, 0, 4],
                          [0, 0, 0, 0],
-                         [0, 0, 0, 0]])
-        board.slide(Vec(1, 3), Vec(0, 1))  # To the right
-        self.assertEqual(board.to_list(),
-                         [[0, 0, 0, 0],
-                          [0, 0, 0, 4],
-                          [0, 0, 0, 0],
-                          [0, 0, 0, 0]])
-
-    def test_empty_wont_slide(self):
-        """Sliding an empty position has no effect"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                         [0, 2, 0, 0],
-                         [0, 0, 2, 0],
-                         [0, 0, 0, 2]])
-        board.slide(Vec(1, 0), Vec(0, 1))  # Space 1,0 is empty
-        self.assertEqual(board.to_list(),
-                         [[2, 0, 0, 0],
-                          [0, 2, 0, 0],
-                          [0, 0, 2, 0],
-                          [0, 0, 0, 2]])
-
-    def test_slide_into_obstacle(self):
-        """A tile should stop when it reaches another tile"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                         [0, 2, 4, 0],
-                         [0, 0, 2, 0],
-                         [0, 0, 0, 2]])
-        board.slide(Vec(1, 1), Vec(0, 1))  # Space 1,0 is empty
-        self.assertEqual(board.to_list(),
-                         [[2, 0, 0, 0],
-                          [0, 2, 4, 0],
-                          [0, 0, 2, 0],
-                          [0, 0, 0, 2]])
-
-    def test_slide_merge(self):
-        """Equal tiles merge when they meet"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                         [0, 2, 2, 4],
-                         [0, 0, 2, 0],
                          [0, 0, 0, 2]])
-        board.slide(Vec(1, 1), Vec(0, 1))
-        self.assertEqual(board.to_list(),
-                         [[2, 0, 0, 0],
-                          [0, 0, 4, 4],
-                          [0, 0, 2, 0],
-                          [0, 0, 0, 2]])
-
-
-class TestMove(unittest.TestCase):
-    """The moves are 'right', 'left', 'up', 'down'.
-    These methods are normally called from the 'keypress.py' module.
-    """
-
-    def test_move_all_right(self):
-        """Simple slide with no merges"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                          [0, 2, 0, 0],
-                          [0, 0, 2, 0],
-                          [0, 0, 0, 2]])
-        board.right();
-        self.assertEqual(board.to_list(),
-                          [[0, 0, 0, 2],
-                           [0, 0, 0, 2],
-                           [0, 0, 0, 2],
-                           [0, 0, 0, 2]])
-
-    def test_move_all_left(self):
-        """Simple slide with no merges"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                          [0, 2, 0, 0],
-                          [0, 0, 2, 0],
-                          [0, 0, 0, 2]])
-        board.left();
-        self.assertEqual(board.to_list(),
-                          [[2, 0, 0, 0],
-                           [2, 0, 0, 0],
-                           [2, 0, 0, 0],
-                           [2, 0, 0, 0]])
-
-    def test_move_all_up(self):
-        """Simple slide with no merges"""
-        board = model.Board()
-        board.from_list([[2, 0, 0, 0],
-                         [0, 2, 0, 0],
-                         [0, 0, 2, 0],
-                         [0, 0, 0, 2]])
-        board.up();
-        self.assertEqual(board.to_list(),
-                          [[2, 2, 2, 2],
-                           [0, 0, 0, 0],
-                           [0, 0, 0, 0],
-                           [0, 0, 0, 0]])
-
-    def test_move_merge_right(self):
-        board = model.Board()
-        board.from_list([[2, 0, 2, 0],
-                         [2, 2, 2, 0],
-                         [2, 2, 0, 0],
-                         [2, 2, 2, 2]])
+        listener = RecordingListener()
+        board.add_listener(listener)
         board.right()
-        self.assertEqual(board.to_list(),
-                          [[0, 0, 0, 4],
-                           [0, 0, 2, 4],  # Must work from right to left
-                           [0, 0, 0, 4],
-                           [0, 0, 4, 4]]) # Tile stops sliding when it merges
-
-    def test_move_merge_up(self):
-        board = model.Board()
-        board.from_list([[4, 0, 2, 2],
-                         [2, 0, 2, 2],
-                         [2, 2, 4, 0],
-                         [2, 2, 2, 2]])
-        board.up()
-        expected = [[4, 4, 8, 4],
-                    [4, 0, 2, 2],
-                    [2, 0, 0, 0],
-                    [0, 0, 0, 0]]
-        actual = board.to_list()
-        # board_diff(actual, expected)
-        self.assertEqual(actual, expected)
-
-if __name__ == "__main__":
-    unittest.main()
+        board.slide(Vec(3, 3), Vec(-1, 0))
+        assert [len(batch) for batch in listener.batches] == [3, 1]
+
+
+def test_merge_frees_space():
+    """has_empty must follow placements and merges"""
+    board = model.Board(rows=1, cols=4)
+    board.from_list([[2, 2, 4, 8]])
+    assert not board.has_empty()
+    board.right()
+    assert board.has_empty()
+    board.place_tile(value=2)
+    assert not board.has_empty()
@@ -7,48 +7,16 @@ wanted to provide more configurability.
 """
 
 import graphics.graphics as graphics
+import tkinter
+import tkinter.font
 import time
+from contextlib import contextmanager
 import game_element
 import model
 from typing import Tuple
-
-##########################
-# Configuration constants
-#########################
-
-WIN_TITLE = "Five Twelve"
-WIN_HEIGHT = 800
-WIN_WIDTH = 800
-MARGIN = WIN_HEIGHT * 0.04  # around each cell
-BACKGROUND_COLOR = "wheat"
-
-# Appearance of tiles. Color ramp is from
-# http://colorbrewer2.org/#type=sequential&scheme=Reds&n=9
-TILE_OUTLINE_NEW = "#ff0000"
-TILE_OUTLINE_OLD = BACKGROUND_COLOR
-# Tile color changes as value increases
-RAMP = {2: '#fff5f0', 4: '#fff5f0',
-        8: '#fee0d2', 16: '#fee0d2',
-        32: '#fcbba1',
-        64: '#fc9272',
-        128: '#fb6a4a',
-        256: '#ef3b2c',
-        512: '#cb181d',
-        1024: '#a50f15',
-        2048: '#67000d',
-        # If anyone gets farther, we use the same color
-        4096: '#67000d',  8192: '#67000d', 16384: '#67000d',
-        # I'm prepared to gamble that nobody can reach 2^16
-        32768: "#ff0000", 65536: "#ff0000"
-        }
-
-# For animating sliding tiles
-ANIMATION_STEPS = 3
-ANIMATION_TIME = 0.05
-
-#######
-# End configuration constants
-######
+from view_config import (WIN_TITLE, WIN_HEIGHT, WIN_WIDTH, MARGIN,
+                         TILE_OUTLINE_NEW, TILE_OUTLINE_OLD, RAMP_BY_LOG2,
+                         ANIMATION_TIME, STEP_MS, MAX_ANIMATED_SLIDES)
 
 # Events we need to respond to:
 #   - A new tile has been created.  Draw it and listen to it.
@@ -65,6 +33,18 @@ class GameView(object):
         self.height = height
         self.width = width
         self.win = graphics.GraphWin(WIN_TITLE, width, height)
+        # Key presses (and closing the window) are written to
+        # this variable; get_key waits on it so that the Tk event
+        # loop keeps running animations while we wait for a key.
+        self._key = tkinter.StringVar(self.win)
+        self.win.bind_all("<Key>", lambda event: self._key.set(event.keysym), add="+")
+        self.win.master.protocol("WM_DELETE_WINDOW", self._on_close)
+        # One font shared by all the tile labels
+        self.tile_font = tkinter.font.Font(self.win, family="helvetica", size=36)
+
+    def _on_close(self):
+        self.win.close()
+        self._key.set("")
 
     def get_key(self) -> str:
         """Acquire a single keystroke as a string,
@@ -72,7 +52,12 @@ class GameView(object):
         encoded as strings, e.g., "Left" for the left
         arrow key.  Encoding conventions are from TkInter.
         """
-        return self.win.getKey()
+        if self.win.isClosed():
+            raise graphics.GraphicsError("getKey in closed window")
+        self.win.wait_variable(self._key)
+        if self.win.isClosed():
+            raise graphics.GraphicsError("getKey in closed window")
+        return self._key.get()
 
     def close(self):
         """Do this last; further interaction with the view
@@ -82,6 +67,8 @@ class GameView(object):
 
     def lose(self, score=0):
         """Display 'Game Over' and close after next keystroke"""
+        # Draw the splash, then repaint once
+        self.win.autoflush = False
         center = graphics.Point(self.width / 2.0, self.height / 2.0)
         if score:
             goodbye = "Game over. Your score: {}".format(score)
@@ -92,6 +79,8 @@ class GameView(object):
         splash.setSize(36)  # The largest font size supported by graphics.py
         splash.setTextColor("red")
         splash.draw(self.win)
+        self.win.flush()
+        self.win.autoflush = True
         try:
             self.get_key()
             self.close()
@@ -104,6 +93,10 @@ class GridView(game_element.GameListener):
     """The grid of spaces in the game, displayed
     within a GameView.
     """
+    __slots__ = ('game', 'win', 'background', 'cell_width', 'tile_width',
+                 'cell_height', 'tile_height', '_corners', '_corners_xy',
+                 '_tile_views', '_tile_pool', '_batching',
+                 '_pending', 'many_slides', 'tiles')
 
     def __init__(self, game: GameView, grid_size: int):
         """Square grid, with a little space
@@ -113,14 +106,35 @@ class GridView(game_element.GameListener):
         """
         self.game = game
         self.win = game.win
+        # Draw the whole grid, then repaint once
+        self.win.autoflush = False
         self.background = graphics.Rectangle(
             graphics.Point(0, 0), graphics.Point(game.width, game.height))
         self.background.setFill("wheat")
         self.background.draw(self.win)
-        self.cell_width = (game.width - MARGIN) / grid_size
+        # Pixel coordinates are whole numbers, so the
+        # geometry is computed in integers
+        self.cell_width = (game.width - MARGIN) // grid_size
         self.tile_width = self.cell_width - MARGIN
-        self.cell_height = (game.height - MARGIN) / grid_size
+        self.cell_height = (game.height - MARGIN) // grid_size
         self.tile_height = self.cell_height - MARGIN
+        # The grid geometry is fixed, so compute each tile's
+        # corners once, as whole pixels for redrawing and as
+        # Points for graphics.py
+        self._corners_xy = [[self._compute_corners(row, col)
+                             for col in range(grid_size)]
+                            for row in range(grid_size)]
+        self._corners = [[(graphics.Point(ul_x, ul_y), graphics.Point(lr_x, lr_y))
+                          for ul_x, ul_y, lr_x, lr_y in row_corners]
+                         for row_corners in self._corners_xy]
+        # The TileView depicting each tile on the board
+        self._tile_views = {}
+        # TileViews whose tiles were removed, kept for reuse
+        self._tile_pool = []
+        # Tile events held back between begin_batch and end_batch
+        self._batching = False
+        self._pending = []
+        self.many_slides = False
         self.tiles = []
         # Initially empty tile spaces
         for row in range(grid_size):
@@ -133,38 +147,109 @@ class GridView(game_element.GameListener):
                 tile_background.draw(self.win)
                 row_tiles.append(tile_background)
             self.tiles.append(row_tiles)
+        self.win.flush()
+        self.win.autoflush = True
 
     def tile_corners(self, row: int, col: int) -> Tuple[graphics.Point, graphics.Point]:
-        """upper left and lower right corners of tile at row,col"""
+        """upper left and lower right corners of tile at row,col.
+        The Points are shared; graphics objects built from them
+        keep their own copies.
+        """
+        return self._corners[row][col]
+
+    def _tile_corners_xy(self, row: int, col: int) -> Tuple[int, int, int, int]:
+        """(ul_x, ul_y, lr_x, lr_y) of tile at row,col"""
+        return self._corners_xy[row][col]
+
+    def _compute_corners(self, row: int, col: int) -> Tuple[int, int, int, int]:
         ul_x = MARGIN + col * self.cell_width
         lr_x = ul_x + self.tile_width
         ul_y = MARGIN + row * self.cell_height
         lr_y = ul_y + self.tile_height
-        ul = graphics.Point(ul_x, ul_y)
-        lr = graphics.Point(lr_x, lr_y)
-        return ul, lr
+        return ul_x, ul_y, lr_x, lr_y
 
     def notify(self, event: game_element.GameEvent):
         """When a tile is created, we attach a new TileView
-        to draw and redraw it as needed.
+        to draw and redraw it as needed.  The board sends us
+        the events for every tile, and we pass each one on to
+        the tile's TileView.
         """
         if event.kind == game_element.EventKind.tile_created:
-            view = TileView(self, event.tile)
-            event.tile.add_listener(view)
+            if self._tile_pool:
+                view = self._tile_pool.pop()
+                view.reuse(event.tile)
+            else:
+                view = TileView(self, event.tile)
+            self._tile_views[event.tile] = view
+        elif event.kind == game_element.EventKind.tile_updated:
+            self._tile_views[event.tile].notify(event)
+        elif event.kind == game_element.EventKind.tile_removed:
+            self._tile_views.pop(event.tile).notify(event)
         else:
             raise Exception("Unexpected event: {}".format(event))
 
+    def begin_batch(self):
+        """Hold back tile updates until end_batch, so that
+        everything one key press changes is drawn at once.
+        """
+        self._batching = True
+        self.win.autoflush = False
+
+    def end_batch(self):
+        """Apply the held-back tile updates (removals last,
+        so absorbed tiles vanish under the tiles that absorbed
+        them), then repaint once.
+        """
+        self._batching = False
+        pending, self._pending = self._pending, []
+        pending.sort(key=lambda item: item[1].kind == game_element.EventKind.tile_removed)
+        slides = sum(1 for view, event in pending
+                     if event.kind == game_element.EventKind.tile_updated
+                     and (view.row, view.col) != (event.tile.row, event.tile.col))
+        self.many_slides = slides > MAX_ANIMATED_SLIDES
+        for view, event in pending:
+            view.apply(event)
+        self.many_slides = False
+        self.win.flush()
+        self.win.autoflush = True
 
-class TileView(object):
+    @contextmanager
+    def batch(self):
+        """begin_batch and end_batch around a block"""
+        self.begin_batch()
+        try:
+            yield
+        finally:
+            self.end_batch()
+
+    def defer(self, view: "TileView", event: game_element.GameEvent) -> bool:
+        """Hold back an event for a TileView if a batch is
+        open.  Returns False if the event should be applied now.
+        """
+        if not self._batching:
+            return False
+        self._pending.append((view, event))
+        return True
+
+    def release(self, view: "TileView"):
+        """A hidden TileView that can depict the next new tile"""
+        self._tile_pool.append(view)
+
+
+class TileView(game_element.GameListener):
     """A Tile is the thing with a number that slides around the grid.
-    A TileView is its graphic depiction.  The TileView object listens
-    for events from the underlying Tile, and updates the depiction as
-    needed.
+    A TileView is its graphic depiction.  The GridView passes on
+    events for the underlying Tile, and the TileView updates the
+    depiction as needed.
     """
+    __slots__ = ('grid', 'win', 'row', 'col', 'value', 'background',
+                 '_state', '_fill', '_outline_cleared', '_background_id',
+                 '_text_id', '_tag', '_generation',
+                 '_slide_start', '_slide_from', '_slide_to')
 
     def __init__(self, grid: GridView, tile: model.Tile):
         """Display the tile on the grid.
-        Internally there are actually two graphics objects:
+        Internally there are actually two canvas items:
         A background rectangle and text within it. The
         background rectangle has a visible outline until
         the first time it moves.
@@ -174,49 +259,127 @@ class TileView(object):
         self.row = tile.row
         self.col = tile.col
         self.value = tile.value
+        # What is drawn, compared as one tuple with each update
+        self._state = (self.row, self.col, self.value)
         ul, lr = grid.tile_corners(self.row, self.col)
         background = graphics.Rectangle(ul, lr)
-        background.setFill(RAMP[self.value])
+        self._fill = RAMP_BY_LOG2[self.value.bit_length() - 2]
+        background.setFill(self._fill)
         background.setOutline(TILE_OUTLINE_NEW)
+        self._outline_cleared = False
         self.background = background
-        cx = (ul.getX() + lr.getX()) / 2.0
-        cy = (ul.getY() + lr.getY()) / 2.0
-        center = graphics.Point(cx, cy)
-        label = graphics.Text(center, str(self.value))
-        label.setSize(36)
-        self.label = label
         background.draw(self.win)
-        label.draw(self.win)
+        # Both canvas items carry one tag, so a single canvas
+        # call hides or raises the whole tile
+        self._tag = f"tile{id(self)}"
+        # Updates go straight to the Tk canvas items
+        self._background_id = background.id
+        self.win.addtag_withtag(self._tag, self._background_id)
+        ul_x, ul_y, lr_x, lr_y = grid._tile_corners_xy(self.row, self.col)
+        cx = (ul_x + lr_x) // 2
+        cy = (ul_y + lr_y) // 2
+        self._text_id = self.win.create_text(cx, cy, text=str(self.value), fill="black",
+                                             font=grid.game.tile_font, tags=self._tag)
+        # Bumped to cancel any slide still in progress, e.g.,
+        # when the tile is removed
+        self._generation = 0
+
+    def reuse(self, tile: model.Tile):
+        """Depict a new tile with the canvas items that were
+        hidden when this view's previous tile was removed.
+        Moving and reconfiguring existing items is cheaper
+        than deleting them and creating new ones.
+        """
+        self.row = tile.row
+        self.col = tile.col
+        self.value = tile.value
+        self._state = (self.row, self.col, self.value)
+        self._fill = RAMP_BY_LOG2[self.value.bit_length() - 2]
+        self._outline_cleared = False
+        self._place()
+        self.win.itemconfigure(self._background_id, fill=self._fill, outline=TILE_OUTLINE_NEW)
+        self.win.itemconfigure(self._text_id, text=str(self.value))
+        self.win.itemconfigure(self._tag, state="normal")
+        self.win.tag_raise(self._tag)
+
+    def _place(self):
+        """Put the canvas items directly at self.row, self.col"""
+        ul_x, ul_y, lr_x, lr_y = self.grid._tile_corners_xy(self.row, self.col)
+        self.win.coords(self._background_id, ul_x, ul_y, lr_x, lr_y)
+        self.win.coords(self._text_id, (ul_x + lr_x) // 2, (ul_y + lr_y) // 2)
 
     def slide_to(self, row, col):
-        """Slide the tile to row,col"""
-        ul_new, lr_new = self.grid.tile_corners(row, col)
-        ul_old, lr_old = self.grid.tile_corners(self.row, self.col)
+        """Slide the tile to row,col.  The animation frames are
+        scheduled on the Tk event loop rather than slept through,
+        so all the tiles in a move slide at the same time.
+        Each frame places the tile by the time elapsed since the
+        slide began, so a busy event loop draws fewer frames
+        rather than a slower slide.  If the grid has many tiles
+        sliding at once, the tile jumps to its new position instead.
+        """
+        from_x, from_y, _, _ = self.grid._tile_corners_xy(self.row, self.col)
         self.row, self.col = row, col
-        dx = (ul_new.getX() - ul_old.getX()) / ANIMATION_STEPS
-        dy = (ul_new.getY() - ul_old.getY()) / ANIMATION_STEPS
-        step_sleep = ANIMATION_TIME / ANIMATION_STEPS
-        for step in range(ANIMATION_STEPS):
-            self.background.setOutline(TILE_OUTLINE_OLD)
-            self.background.move(dx, dy)
-            self.label.move(dx, dy)
-            time.sleep(step_sleep)
+        if not self._outline_cleared:
+            # Not setOutline, which would also resend the fill
+            # this view's first tile was drawn with
+            self.win.itemconfigure(self._background_id, outline=TILE_OUTLINE_OLD)
+            self._outline_cleared = True
+        # Stop any slide in progress
+        self._generation += 1
+        if self.grid.many_slides:
+            self._place()
+            return
+        to_x, to_y, _, _ = self.grid._tile_corners_xy(row, col)
+        self._slide_from = (from_x, from_y)
+        self._slide_to = (to_x, to_y)
+        self._slide_start = time.monotonic()
+        self.win.after_idle(self._tick_slide, self._generation)
+
+    def _tick_slide(self, generation: int):
+        """Draw one frame of the slide started by slide_to"""
+        if self.win.isClosed() or self._generation != generation:
+            return
+        t = min(1.0, (time.monotonic() - self._slide_start) / ANIMATION_TIME)
+        from_x, from_y = self._slide_from
+        to_x, to_y = self._slide_to
+        x = from_x + (to_x - from_x) * t
+        y = from_y + (to_y - from_y) * t
+        width, height = self.grid.tile_width, self.grid.tile_height
+        self.win.coords(self._background_id, x, y, x + width, y + height)
+        self.win.coords(self._text_id, x + width // 2, y + height // 2)
+        if t < 1.0:
+            self.win.after(STEP_MS, self._tick_slide, generation)
 
     def notify(self, event: game_element.GameEvent):
         """Receive notification of change from a tile.
+        The change is drawn now, or when the grid's batch ends.
         """
+        if not self.grid.defer(self, event):
+            self.apply(event)
+
+    def apply(self, event: game_element.GameEvent):
+        """Update the depiction for a change to the tile"""
         if event.kind == game_element.EventKind.tile_updated:
-            row, col = event.tile.row, event.tile.col
+            tile = event.tile
+            state = (tile.row, tile.col, tile.value)
+            if state == self._state:
+                return
+            row, col, value = self._state = state
             if self.row != row or self.col != col:
                 self.slide_to(row, col)
-            if self.value != event.tile.value:
-                self.value = event.tile.value
-                tile_color = RAMP[event.tile.value]
-                self.background.setFill(tile_color)
-                self.label.setText(str(event.tile.value))
+            if self.value != value:
+                self.value = value
+                tile_color = RAMP_BY_LOG2[self.value.bit_length() - 2]
+                # Neighboring values often share a color; skip
+                # the Tk round trip when the fill is unchanged
+                if tile_color != self._fill:
+                    self._fill = tile_color
+                    self.win.itemconfigure(self._background_id, fill=tile_color)
+                self.win.itemconfigure(self._text_id, text=str(self.value))
         elif event.kind == game_element.EventKind.tile_removed:
-            self.label.undraw()
-            self.background.undraw()
+            self._generation += 1
+            self.win.itemconfigure(self._tag, state="hidden")
+            self.grid.release(self)
         else:
             raise Exception("Unexpected event {}".format(event))
 
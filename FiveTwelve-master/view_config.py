@@ -0,0 +1,51 @@
+"""
+Configuration constants for the views of 512 (2048 clone):
+window size, colors, and animation timing.  Shared by the
+graphics.py view (view.py) and the pygame view (view_pygame.py),
+so it must not import either graphics library.
+"""
+
+##########################
+# Configuration constants
+#########################
+
+WIN_TITLE = "Five Twelve"
+WIN_HEIGHT = 800
+WIN_WIDTH = 800
+MARGIN = int(WIN_HEIGHT * 0.04)  # around each cell, in whole pixels
+BACKGROUND_COLOR = "wheat"
+
+# Appearance of tiles. Color ramp is from
+# http://colorbrewer2.org/#type=sequential&scheme=Reds&n=9
+TILE_OUTLINE_NEW = "#ff0000"
+TILE_OUTLINE_OLD = BACKGROUND_COLOR
+# Tile color changes as value increases
+RAMP = {2: '#fff5f0', 4: '#fff5f0',
+        8: '#fee0d2', 16: '#fee0d2',
+        32: '#fcbba1',
+        64: '#fc9272',
+        128: '#fb6a4a',
+        256: '#ef3b2c',
+        512: '#cb181d',
+        1024: '#a50f15',
+        2048: '#67000d',
+        # If anyone gets farther, we use the same color
+        4096: '#67000d',  8192: '#67000d', 16384: '#67000d',
+        # I'm prepared to gamble that nobody can reach 2^16
+        32768: "#ff0000", 65536: "#ff0000"
+        }
+# Tile values are powers of two, so the ramp can be indexed
+# by log2(value) - 1, i.e., value.bit_length() - 2
+RAMP_BY_LOG2 = tuple(RAMP[1 << k] for k in range(1, 17))
+
+# For animating sliding tiles
+ANIMATION_STEPS = 3
+ANIMATION_TIME = 0.05
+STEP_MS = int(ANIMATION_TIME * 1000 / ANIMATION_STEPS)  # Between frames
+# When more tiles than this slide in one key press, they jump
+# straight to their new positions instead of being animated
+MAX_ANIMATED_SLIDES = 8
+
+#######
+# End configuration constants
+######
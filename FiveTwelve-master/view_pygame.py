@@ -0,0 +1,394 @@
+"""
+View component of 512 (2048 clone) drawn with pygame
+rather than graphics.py and Tk.  It offers the same
+GameView, GridView, and TileView classes as view.py,
+so game_manager.py can use either.
+
+Each tile value is drawn once, when the grid is built,
+into a pygame Surface.  A frame is then the board
+background plus one blit per tile, and only the parts
+of the window that changed are sent to the display.
+
+Requires pygame, but not Tk; game_manager.py uses this
+view when run with --pygame.
+"""
+
+import pygame
+import time
+from contextlib import contextmanager
+import game_element
+import model
+from typing import Tuple
+# Colors and timing are shared with the Tk view
+from view_config import (WIN_TITLE, WIN_HEIGHT, WIN_WIDTH, MARGIN, BACKGROUND_COLOR,
+                         TILE_OUTLINE_NEW, RAMP_BY_LOG2,
+                         ANIMATION_TIME, STEP_MS, MAX_ANIMATED_SLIDES)
+
+FONT_SIZE = 48
+SPLASH_FONT_SIZE = 48
+OUTLINE_WIDTH = 2
+
+# pygame key codes for the keys that Tk names differently
+# than pygame.key.name does
+KEY_NAMES = {pygame.K_LEFT: "Left", pygame.K_RIGHT: "Right",
+             pygame.K_UP: "Up", pygame.K_DOWN: "Down"}
+
+
+class GraphicsError(Exception):
+    """Raised when waiting for a key in a closed window,
+    like graphics.GraphicsError in the Tk view.
+    """
+    pass
+
+
+class GameView(object):
+    """The overall view (game window)"""
+
+    def __init__(self, height=WIN_HEIGHT, width=WIN_WIDTH):
+        """The GameView is associated with a pygame display"""
+        self.height = height
+        self.width = width
+        pygame.init()
+        pygame.display.set_caption(WIN_TITLE)
+        self.screen = pygame.display.set_mode((width, height))
+        self._closed = False
+        # keypress.Command asks game_view.win whether the
+        # window was closed
+        self.win = self
+        # Set by the GridView, which draws between key presses
+        self.grid = None
+
+    def isClosed(self) -> bool:
+        return self._closed
+
+    def get_key(self) -> str:
+        """Acquire a single keystroke as a string, named
+        as Tk would name it, e.g., "e" for the "e" key
+        and "Left" for the left arrow key.  Animations
+        keep running while we wait: a frame is drawn when
+        the wait times out, or on any other event.
+        """
+        while not self._closed:
+            animating = self.grid is not None and self.grid.animating()
+            event = pygame.event.wait(STEP_MS if animating else 0)
+            if event.type == pygame.QUIT:
+                self.close()
+            elif event.type == pygame.KEYDOWN:
+                return KEY_NAMES.get(event.key, pygame.key.name(event.key))
+            elif animating:
+                self.grid.animate()
+        raise GraphicsError("getKey in closed window")
+
+    def close(self):
+        """Do this last; further interaction with the view
+        after 'close' is an arrow.
+        """
+        if not self._closed:
+            self._closed = True
+            pygame.quit()
+
+    def lose(self, score=0):
+        """Display 'Game Over' and close after next keystroke"""
+        if score:
+            goodbye = "Game over. Your score: {}".format(score)
+        else:
+            goodbye = "Game over"
+        if self.grid is not None:
+            self.grid.finish_animation()
+        font = pygame.font.SysFont("times", SPLASH_FONT_SIZE)
+        splash = font.render(goodbye, True, pygame.Color("red"))
+        rect = splash.get_rect(center=(self.width // 2, self.height // 2))
+        self.screen.blit(splash, rect)
+        pygame.display.update(rect)
+        try:
+            self.get_key()
+            self.close()
+        except GraphicsError as e:
+            # This happens when the close button is pressed.
+            pass
+
+
+class GridView(game_element.GameListener):
+    """The grid of spaces in the game, displayed
+    within a GameView.
+    """
+    __slots__ = ('game', 'screen', 'cell_width', 'tile_width', 'cell_height',
+                 'tile_height', '_corners', 'background', 'images',
+                 '_tile_views', '_tile_pool', '_batching', '_pending',
+                 'many_slides', '_dirty')
+
+    def __init__(self, game: GameView, grid_size: int):
+        """Square grid, with a little space
+        around the tiles.
+        Args:
+           game: The surrounding GameView object
+        """
+        self.game = game
+        self.screen = game.screen
+        game.grid = self
+        self.cell_width = (game.width - MARGIN) // grid_size
+        self.tile_width = self.cell_width - MARGIN
+        self.cell_height = (game.height - MARGIN) // grid_size
+        self.tile_height = self.cell_height - MARGIN
+        self._corners = [[self._compute_corners(row, col)
+                          for col in range(grid_size)]
+                         for row in range(grid_size)]
+        # The empty grid, drawn once and blitted under the tiles
+        self.background = pygame.Surface((game.width, game.height))
+        self.background.fill(pygame.Color(BACKGROUND_COLOR))
+        for row in range(grid_size):
+            for col in range(grid_size):
+                rect = self.tile_rect(row, col)
+                pygame.draw.rect(self.background, pygame.Color("grey"), rect)
+                pygame.draw.rect(self.background, pygame.Color("white"), rect, 1)
+        # One image per tile value, indexed like RAMP_BY_LOG2
+        font = pygame.font.SysFont(None, FONT_SIZE)
+        size = (self.tile_width, self.tile_height)
+        self.images = []
+        for log2, color in enumerate(RAMP_BY_LOG2, start=1):
+            image = pygame.Surface(size)
+            image.fill(pygame.Color(color))
+            label = font.render(str(1 << log2), True, pygame.Color("black"))
+            image.blit(label, label.get_rect(center=image.get_rect().center))
+            self.images.append(image)
+        # The TileView depicting each tile on the board,
+        # in drawing order
+        self._tile_views = {}
+        self._tile_pool = []
+        # Tile events held back between begin_batch and end_batch
+        self._batching = False
+        self._pending = []
+        self.many_slides = False
+        # Screen areas to send to the display on the next repaint
+        self._dirty = []
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def tile_corners(self, row: int, col: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """upper left and lower right corners of tile at row,col"""
+        return self._corners[row][col]
+
+    def _compute_corners(self, row: int, col: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        ul_x = MARGIN + col * self.cell_width
+        lr_x = ul_x + self.tile_width
+        ul_y = MARGIN + row * self.cell_height
+        lr_y = ul_y + self.tile_height
+        return (ul_x, ul_y), (lr_x, lr_y)
+
+    def tile_rect(self, row: int, col: int) -> pygame.Rect:
+        """The screen area of the tile at row,col"""
+        (ul_x, ul_y), (lr_x, lr_y) = self.tile_corners(row, col)
+        return pygame.Rect(ul_x, ul_y, lr_x - ul_x, lr_y - ul_y)
+
+    def image(self, value: int) -> pygame.Surface:
+        """The pre-rendered image of a tile with this value"""
+        return self.images[value.bit_length() - 2]
+
+    def notify(self, event: game_element.GameEvent):
+        """When a tile is created, we attach a new TileView
+        to draw and redraw it as needed.  The board sends us
+        the events for every tile, and we pass each one on to
+        the tile's TileView.
+        """
+        if event.kind == game_element.EventKind.tile_created:
+            if self._tile_pool:
+                view = self._tile_pool.pop()
+                view.reuse(event.tile)
+            else:
+                view = TileView(self, event.tile)
+            self._tile_views[event.tile] = view
+            if not self._batching:
+                self.repaint()
+        elif event.kind == game_element.EventKind.tile_updated:
+            self._tile_views[event.tile].notify(event)
+        elif event.kind == game_element.EventKind.tile_removed:
+            self._tile_views.pop(event.tile).notify(event)
+        else:
+            raise Exception("Unexpected event: {}".format(event))
+
+    def begin_batch(self):
+        """Hold back tile updates until end_batch, so that
+        everything one key press changes is drawn at once.
+        """
+        self._batching = True
+
+    def end_batch(self):
+        """Apply the held-back tile updates, then repaint once."""
+        self._batching = False
+        pending, self._pending = self._pending, []
+        slides = sum(1 for view, event in pending
+                     if event.kind == game_element.EventKind.tile_updated
+                     and (view.row, view.col) != (event.tile.row, event.tile.col))
+        self.many_slides = slides > MAX_ANIMATED_SLIDES
+        for view, event in pending:
+            view.apply(event)
+        self.many_slides = False
+        self.repaint()
+
+    @contextmanager
+    def batch(self):
+        """begin_batch and end_batch around a block"""
+        self.begin_batch()
+        try:
+            yield
+        finally:
+            self.end_batch()
+
+    def defer(self, view: "TileView", event: game_element.GameEvent) -> bool:
+        """Hold back an event for a TileView if a batch is
+        open.  Returns False if the event should be applied now.
+        """
+        if not self._batching:
+            return False
+        self._pending.append((view, event))
+        return True
+
+    def release(self, view: "TileView"):
+        """A TileView that can depict the next new tile"""
+        self._tile_pool.append(view)
+
+    def mark_dirty(self, rect: pygame.Rect):
+        """This part of the screen must be sent on the next repaint"""
+        self._dirty.append(rect.copy())
+
+    def repaint(self):
+        """Draw the board and all the tiles, then update the
+        parts of the display that changed.
+        """
+        if self.game.isClosed():
+            return
+        self.screen.blit(self.background, (0, 0))
+        views = list(self._tile_views.values())
+        self.screen.blits([(view.image, view.rect) for view in views], False)
+        for view in views:
+            if view.outlined:
+                pygame.draw.rect(self.screen, pygame.Color(TILE_OUTLINE_NEW),
+                                 view.rect, OUTLINE_WIDTH)
+        dirty, self._dirty = self._dirty, []
+        pygame.display.update(dirty)
+
+    def animating(self) -> bool:
+        """Are any tiles still sliding?"""
+        return any(view.sliding() for view in self._tile_views.values())
+
+    def animate(self, now: float = None):
+        """Put each sliding tile where it should be at time
+        'now' (by default, the current time) and repaint
+        """
+        if now is None:
+            now = time.monotonic()
+        for view in self._tile_views.values():
+            if view.sliding():
+                view.tick_slide(now)
+        self.repaint()
+
+    def finish_animation(self):
+        """Put every sliding tile at its destination"""
+        self.animate(float("inf"))
+
+
+class TileView(game_element.GameListener):
+    """A Tile is the thing with a number that slides around the grid.
+    A TileView is its graphic depiction: a pre-rendered image
+    and the screen rectangle it is drawn in.  The GridView passes
+    on events for the underlying Tile, and the TileView updates
+    the depiction as needed.
+    """
+    __slots__ = ('grid', 'row', 'col', 'value', 'image', 'rect', 'outlined',
+                 '_slide_start', '_slide_from', '_slide_to')
+
+    def __init__(self, grid: GridView, tile: model.Tile):
+        """Display the tile on the grid.  The tile has a
+        visible outline until the first time it moves.
+        """
+        self.grid = grid
+        self.reuse(tile)
+
+    def reuse(self, tile: model.Tile):
+        """Depict a new tile; also used for a view whose
+        previous tile was removed.
+        """
+        self.row = tile.row
+        self.col = tile.col
+        self.value = tile.value
+        self.image = self.grid.image(self.value)
+        self.rect = self.grid.tile_rect(self.row, self.col)
+        self.outlined = True
+        # Start time and end points of the slide in progress;
+        # _slide_to is None when the tile is not sliding
+        self._slide_start = 0.0
+        self._slide_from = self.rect.topleft
+        self._slide_to = None
+        self.grid.mark_dirty(self.rect)
+
+    def sliding(self) -> bool:
+        return self._slide_to is not None
+
+    def tick_slide(self, now: float):
+        """Put the tile where the slide in progress has it
+        at time 'now'.  Positions follow the time elapsed, so
+        slides take ANIMATION_TIME however many frames are drawn.
+        """
+        t = min(1.0, (now - self._slide_start) / ANIMATION_TIME)
+        from_x, from_y = self._slide_from
+        to_x, to_y = self._slide_to
+        self.grid.mark_dirty(self.rect)
+        self.rect.topleft = (round(from_x + (to_x - from_x) * t),
+                             round(from_y + (to_y - from_y) * t))
+        self.grid.mark_dirty(self.rect)
+        if t >= 1.0:
+            self._slide_to = None
+
+    def slide_to(self, row, col):
+        """Slide the tile to row,col.  The frames are drawn by
+        the GridView while the game waits for the next key,
+        so all the tiles in a move slide at the same time.
+        If the grid has many tiles sliding at once, the tile
+        jumps to its new position instead.
+        """
+        self.row, self.col = row, col
+        self.outlined = False
+        self.grid.mark_dirty(self.rect)
+        dest = self.grid.tile_rect(row, col)
+        if self.grid.many_slides:
+            self._slide_to = None
+            self.rect = dest
+            self.grid.mark_dirty(self.rect)
+            return
+        self._slide_from = self.rect.topleft
+        self._slide_to = dest.topleft
+        self._slide_start = time.monotonic()
+
+    def notify(self, event: game_element.GameEvent):
+        """Receive notification of change from a tile.
+        The change is drawn now, or when the grid's batch ends.
+        """
+        if not self.grid.defer(self, event):
+            self.apply(event)
+            self.grid.repaint()
+
+    def apply(self, event: game_element.GameEvent):
+        """Update the depiction for a change to the tile"""
+        if event.kind == game_element.EventKind.tile_updated:
+            row, col = event.tile.row, event.tile.col
+            if self.row != row or self.col != col:
+                self.slide_to(row, col)
+            if self.value != event.tile.value:
+                self.value = event.tile.value
+                self.image = self.grid.image(self.value)
+                self.grid.mark_dirty(self.rect)
+        elif event.kind == game_element.EventKind.tile_removed:
+            self._slide_to = None
+            self.grid.mark_dirty(self.rect)
+            self.grid.release(self)
+        else:
+            raise Exception("Unexpected event {}".format(event))
+
+
+if __name__ == "__main__":
+    game_view = GameView(600, 600)
+    grid_view = GridView(game_view, 4)
+    grid = model.Board()
+    grid.add_listener(grid_view)
+    grid.place_tile()
+    game_view.lose()